@@ -1,4 +1,7 @@
 import sys
+import time
+import argparse
+import tempfile
 import cv2
 import numpy as np
 import serial  # For serial communication
@@ -6,11 +9,16 @@ from serial import SerialException
 from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QComboBox, QVBoxLayout, QHBoxLayout, QWidget, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QProgressDialog
 from PyQt6.QtGui import QImage, QPixmap, QIcon, QFont
 from PyQt6.QtCore import QTimer, Qt
-import openpyxl
+import threading
 from datetime import datetime
+from excel_rollover import WorkbookRollover
+from frame_quality import score_frame, capture_best_frame, FOCUS_THRESHOLD
+from session_recorder import SessionRecorder, SessionReplayer, RecordingCapture
+from frame_bus import FrameBus
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, record_path=None, replay_path=None, replay_fast=False, frame_bus_name="machine_dashboard_frames",
+            compact_group=None):
         super(MainWindow, self).__init__()
 
         self.setWindowTitle("Machine Dashboard")
@@ -32,13 +40,13 @@ class MainWindow(QMainWindow):
         self.upload_btn = QPushButton("Upload", self)
         self.upload_btn.setFixedSize(150, 50)
         self.upload_btn.setFont(QFont('Arial', 14))
-        self.upload_btn.clicked.connect(self.export_to_excel)
+        self.upload_btn.clicked.connect(lambda: self.button_action("upload"))
         button_layout.addWidget(self.upload_btn, alignment=Qt.AlignmentFlag.AlignCenter)
 
         self.delete_btn = QPushButton("Delete", self)
         self.delete_btn.setFixedSize(150, 50)
         self.delete_btn.setFont(QFont('Arial', 14))
-        self.delete_btn.clicked.connect(self.delete_data)
+        self.delete_btn.clicked.connect(lambda: self.button_action("delete"))
         button_layout.addWidget(self.delete_btn, alignment=Qt.AlignmentFlag.AlignCenter)
 
         left_layout.addLayout(button_layout)
@@ -53,7 +61,16 @@ class MainWindow(QMainWindow):
 
         self.cam_select = QComboBox(self)
         self.cam_select.addItems(["Camera 1", "Camera 2"])
-        center_layout.addWidget(self.cam_select)
+
+        # Live focus indicator next to the camera dropdown
+        self.focus_label = QLabel("Focus: -", self)
+        self.focus_label.setFixedWidth(200)
+        self.focus_label.setFont(QFont('Arial', 12))
+
+        cam_layout = QHBoxLayout()
+        cam_layout.addWidget(self.cam_select)
+        cam_layout.addWidget(self.focus_label)
+        center_layout.addLayout(cam_layout)
 
         self.info_table = QTableWidget(4, 2, self)
         self.info_table.setHorizontalHeaderLabels(["Field", "Value"])
@@ -67,12 +84,12 @@ class MainWindow(QMainWindow):
         self.confirm_btn = QPushButton("Confirm", self)
         self.confirm_btn.setFixedSize(150, 50)
         self.confirm_btn.setFont(QFont('Arial', 14))
-        self.confirm_btn.clicked.connect(self.confirm_data)
+        self.confirm_btn.clicked.connect(lambda: self.button_action("confirm"))
 
         self.rescan_btn = QPushButton("Rescan", self)
         self.rescan_btn.setFixedSize(150, 50)
         self.rescan_btn.setFont(QFont('Arial', 14))
-        self.rescan_btn.clicked.connect(self.rescan_data)
+        self.rescan_btn.clicked.connect(lambda: self.button_action("rescan"))
 
         right_button_layout = QHBoxLayout()
         right_button_layout.addWidget(self.rescan_btn, alignment=Qt.AlignmentFlag.AlignCenter)  
@@ -96,18 +113,64 @@ class MainWindow(QMainWindow):
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_frame)
         self.capture = None
+        self.last_frame = None
+        self.best_frame = None
+        self.best_scores = None
+        self.preview_frozen_until = 0  # Keep the chosen burst frame on screen until this time
+        self.focus_ok = None
 
         self.cam_select.currentIndexChanged.connect(self.start_camera)
 
+        # Optional session recording of frames, serial lines and button actions
+        self.recorder = SessionRecorder(record_path) if record_path else None
+        self.replayer = None
+        self.replaying = bool(replay_path)
+        self.replay_burst = None  # Recorded burst frames handed over by the replayer
+
+        # Shared-memory ring other consumers can read frames from, sized for the 1280x720 capture
+        self.frame_bus = None
+        if frame_bus_name:
+            try:
+                self.frame_bus = FrameBus(frame_bus_name, shape=(720, 1280, 3), slots=4, create=True)
+            except (FileExistsError, OSError) as e:
+                self.show_warning("Frame Bus Disabled", f"Unable to create frame bus {frame_bus_name}: {e}")
+
         # Serial setup
         self.serial_port = None
-        self.connect_to_serial()
+        if not replay_path:
+            self.connect_to_serial()
 
         # Timer to check for serial data
         self.serial_timer = QTimer(self)
         self.serial_timer.timeout.connect(self.read_serial_data)
         self.serial_timer.start(100)  # Check serial data every 100ms
 
+        # Excel shards roll over daily or every 5000 rows, listed in a manifest
+        headers = ["LOT ID", "CBD", "Maker", "BMS", "Total", "Timestamp"]
+        if replay_path:
+            # Replayed uploads go to a scratch folder, never to the production shards
+            scratch_folder = tempfile.mkdtemp(prefix="dashboard_replay_")
+            print(f"Replay uploads go to {scratch_folder}")
+            self.workbook_rollover = WorkbookRollover(scratch_folder, "Database_test", headers,
+                period="day", max_rows=5000)
+        else:
+            self.workbook_rollover = WorkbookRollover("F:\\Project\\GUI", "Database_test", headers,
+                period="day", max_rows=5000, legacy_file="Database_test.xlsx")
+        self.compact_group = compact_group
+        self.compact_thread = None
+
+        # Optional timer to merge closed shards in the background, never during a replay
+        self.compact_timer = QTimer(self)
+        self.compact_timer.timeout.connect(self.compact_workbooks)
+        if compact_group and not replay_path:
+            self.compact_timer.start(60 * 60 * 1000)  # Check for shards to merge every hour
+
+        # Replay a recorded session instead of using the camera and ESP
+        if replay_path:
+            self.replayer = SessionReplayer(replay_path, self, realtime=not replay_fast)
+            self.replayer.start()
+            return
+
         # Start camera and check connection
         self.connect_camera()
 
@@ -125,22 +188,39 @@ class MainWindow(QMainWindow):
                     command = self.serial_port.readline().decode('utf-8').strip()
                     print(f"Received command: {command}")
 
-                    if command == "upload":
-                        self.export_to_excel()
-                    elif command == "delete":
-                        self.delete_data()
-                    elif command == "rescan":
-                        self.rescan_data()
-                    elif command == "confirm":
-                        self.confirm_data()
+                    if self.recorder:
+                        self.recorder.record_serial(command)
+                    self.handle_command(command)
             except SerialException:
                 QMessageBox.warning(self, "Microcontroller Disconnected", "Microcontroller is disconnected. Running without ESP.")
                 self.serial_port = None  # Set to None to stop further checks
 
+    def show_warning(self, title, text):
+        # Modal dialogs would stall a replay, so only log them there
+        if self.replaying:
+            print(f"{title}: {text}")
+            return
+        QMessageBox.warning(self, title, text)
+
+    def handle_command(self, command):
+        if command == "upload":
+            self.export_to_excel()
+        elif command == "delete":
+            self.delete_data()
+        elif command == "rescan":
+            self.rescan_data()
+        elif command == "confirm":
+            self.confirm_data()
+
+    def button_action(self, name):
+        if self.recorder:
+            self.recorder.record_action(name)
+        self.handle_command(name)
+
     def confirm_data(self):
         # Check if left table is full
         if self.data_table.rowCount() == 24 and self.data_table.item(23, 0) is not None:
-            QMessageBox.warning(self, "Limit Reached", "Please upload the data before adding more.")
+            self.show_warning("Limit Reached", "Please upload the data before adding more.")
             return
 
         # Find the first empty row in the left table
@@ -151,9 +231,12 @@ class MainWindow(QMainWindow):
                 break
         
         if next_empty_row is None:
-            QMessageBox.warning(self, "Limit Reached", "Please upload the data before adding more.")
+            self.show_warning("Limit Reached", "Please upload the data before adding more.")
             return
 
+        # Use the sharpest frame from a short burst
+        self.capture_burst()
+
         # Transfer data from the right table to the left table
         data_added = False
         for row in range(self.info_table.rowCount()):
@@ -180,6 +263,49 @@ class MainWindow(QMainWindow):
         # Clear the right table value column
         self.clear_right_table()
 
+        # Grab a fresh burst and keep the sharpest frame
+        self.capture_burst()
+
+    def capture_burst(self):
+        if self.replay_burst is not None and self.replay_burst.frames:
+            capture = self.replay_burst
+        elif not self.replaying and self.capture and self.capture.isOpened():
+            # Record the burst frames too so a replay scores the same frames
+            capture = RecordingCapture(self.capture, self.recorder) if self.recorder else self.capture
+        else:
+            capture = None
+
+        if capture is not None:
+            frame, scores = capture_best_frame(capture, count=5, time_budget=0.3)
+            if frame is None:
+                print("Error: Unable to capture burst")
+                return
+            frame = cv2.flip(frame, 1)
+        elif self.last_frame is not None:
+            # Without a camera or recorded burst frames use the last frame shown
+            frame, scores = self.last_frame, score_frame(self.last_frame)
+        else:
+            return
+
+        self.best_frame = frame
+        self.best_scores = scores
+        if self.frame_bus:
+            self.frame_bus.publish_selected(self.fit_to_bus(frame))
+        print(f"Best frame: sharpness {scores['sharpness']:.1f}, exposure {scores['exposure']:.2f}")
+        # Hold the chosen frame on screen so the operator sees what was used
+        self.preview_frozen_until = time.monotonic() + 1.5
+        self.show_frame(self.best_frame)
+        self.update_focus_label(scores)
+
+    def update_focus_label(self, scores):
+        self.focus_label.setText(f"Focus: {scores['sharpness']:.0f}  Exposure: {scores['exposure']:.2f}")
+
+        # Only restyle when the state flips, setStyleSheet re-polishes the widget
+        focus_ok = scores["sharpness"] >= FOCUS_THRESHOLD
+        if focus_ok != self.focus_ok:
+            self.focus_ok = focus_ok
+            self.focus_label.setStyleSheet("color: green;" if focus_ok else "color: red;")
+
     def delete_data(self):
         # Clear all items in the data_table
         self.data_table.clearContents()
@@ -188,39 +314,47 @@ class MainWindow(QMainWindow):
     def export_to_excel(self):
         # Check if there is data to export
         if self.data_table.item(0, 0) is None:
-            QMessageBox.warning(self, "No Data", "There is no data to export to Excel.")
+            self.show_warning("No Data", "There is no data to export to Excel.")
             return
 
-        file_path = "F:\\Project\\GUI\\Database_test.xlsx"
-        
+        # Collect the filled rows from the table
+        rows = []
+        for row in range(self.data_table.rowCount()):
+            if self.data_table.item(row, 0) is None:
+                break
+            values = []
+            for col in range(self.data_table.columnCount()):
+                item = self.data_table.item(row, col)
+                values.append(item.text() if item is not None else None)
+            rows.append(values)
+
         try:
-            # Load the existing workbook
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook.active
-
-            # Find the next available row in the sheet
-            next_row = sheet.max_row + 2
-
-            # Write data from the table to the Excel sheet, starting from column 2 (B) to match "LOT ID"
-            for row in range(self.data_table.rowCount()):
-                if self.data_table.item(row, 0) is None:
-                    break
-                for col in range(self.data_table.columnCount()):
-                    item = self.data_table.item(row, col)
-                    if item is not None:
-                        sheet.cell(row=next_row + row, column=col + 2, value=item.text())  # column=col + 2 to skip the "No." column
-
-            # Save the workbook
-            workbook.save(file_path)
+            # Append to the current shard only
+            file_path = self.workbook_rollover.append_rows(rows)
             print(f"Data appended to {file_path}")
-            
+
             # Clear the data on the dashboard
             self.clear_dashboard_data()
 
         except PermissionError:
-            QMessageBox.warning(self, "File Open Error", "Please close the Excel file before uploading.")
+            self.show_warning("File Open Error", "Please close the Excel file before uploading.")
+        except Exception as e:
+            self.show_warning("Error", f"An error occurred: {e}")
+
+    def compact_workbooks(self):
+        # Skip if the previous merge is still running
+        if self.compact_thread and self.compact_thread.is_alive():
+            return
+
+        self.compact_thread = threading.Thread(target=self.run_compaction, daemon=True)
+        self.compact_thread.start()
+
+    def run_compaction(self):
+        try:
+            for merged_path in self.workbook_rollover.compact(group=self.compact_group):
+                print(f"Shards merged into {merged_path}")
         except Exception as e:
-            QMessageBox.warning(self, "Error", f"An error occurred: {e}")
+            print(f"Error: Unable to merge shards: {e}")
 
     def clear_dashboard_data(self):
         self.data_table.clearContents()
@@ -246,14 +380,37 @@ class MainWindow(QMainWindow):
         if self.capture and self.capture.isOpened():
             ret, frame = self.capture.read()
             if ret:
-                frame = cv2.flip(frame, 1)
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                height, width, channel = image.shape
-                step = channel * width
-                q_image = QImage(image.data, width, height, step, QImage.Format.Format_RGB888)
-                
-                self.camera_label.setPixmap(QPixmap.fromImage(q_image).scaled(
-                    self.camera_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+                if self.recorder:
+                    self.recorder.record_frame(frame)
+                self.process_frame(frame)
+
+    def process_frame(self, frame):
+        frame = cv2.flip(frame, 1)
+        self.last_frame = frame
+        self.publish_frame(frame)
+        if time.monotonic() >= self.preview_frozen_until:
+            self.show_frame(frame)
+            self.update_focus_label(score_frame(frame))
+
+    def publish_frame(self, frame):
+        if self.frame_bus:
+            self.frame_bus.publish(self.fit_to_bus(frame))
+
+    def fit_to_bus(self, frame):
+        # Cameras that ignore the requested resolution are resized to the bus frame size
+        if frame.shape != self.frame_bus.shape:
+            height, width = self.frame_bus.shape[:2]
+            frame = cv2.resize(frame, (width, height))
+        return frame
+
+    def show_frame(self, frame):
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        height, width, channel = image.shape
+        step = channel * width
+        q_image = QImage(image.data, width, height, step, QImage.Format.Format_RGB888)
+
+        self.camera_label.setPixmap(QPixmap.fromImage(q_image).scaled(
+            self.camera_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
 
     def connect_camera(self):
         progress_dialog = QProgressDialog("Connecting to camera...", None, 0, 0, self)
@@ -273,7 +430,9 @@ class MainWindow(QMainWindow):
         self.update_frame()
 
     def resizeEvent(self, event):
-        if self.capture:
+        if time.monotonic() < self.preview_frozen_until and self.best_frame is not None:
+            self.show_frame(self.best_frame)
+        elif self.capture:
             self.update_frame()
         super(MainWindow, self).resizeEvent(event)
 
@@ -284,8 +443,25 @@ class MainWindow(QMainWindow):
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
 
+        if self.recorder:
+            self.recorder.close()
+
+        if self.frame_bus:
+            self.frame_bus.close()
+            self.frame_bus.unlink()
+            self.frame_bus = None
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="Machine Dashboard")
+    parser.add_argument("--record", help="Record frames, serial lines and button actions to this file")
+    parser.add_argument("--replay", help="Replay a recorded session instead of using the camera and ESP")
+    parser.add_argument("--fast", action="store_true", help="Replay as fast as possible instead of in real time")
+    parser.add_argument("--frame-bus", default="machine_dashboard_frames", help="Shared-memory frame bus name, empty to disable")
+    parser.add_argument("--compact", choices=["day", "week", "month"], help="Merge closed Excel shards per period in the background")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(record_path=args.record, replay_path=args.replay, replay_fast=args.fast,
+        frame_bus_name=args.frame_bus, compact_group=args.compact)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,200 @@
+import os
+import json
+import threading
+import openpyxl
+from datetime import datetime
+
+# strftime formats used to name and group shards
+PERIOD_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+
+class WorkbookRollover:
+    def __init__(self, folder, prefix, headers, period="day", max_rows=5000, legacy_file=None):
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"Unknown rollover period: {period}")
+
+        self.folder = folder
+        self.prefix = prefix
+        self.headers = headers
+        self.period = period
+        self.max_rows = max_rows
+        self.legacy_file = legacy_file
+        self.manifest_path = os.path.join(folder, f"{prefix}_manifest.json")
+        self.template_path = os.path.join(folder, f"{prefix}_template.xlsx")
+
+        # Guards the manifest so uploads and the compaction job don't race
+        self.lock = threading.Lock()
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            manifest = {"shards": []}
+            if self.legacy_file and os.path.exists(os.path.join(self.folder, self.legacy_file)):
+                # Save straight away so the large legacy workbook is only loaded once
+                self.register_legacy(manifest)
+                self.save_manifest(manifest)
+            return manifest
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        # Write to a temp file first so a crash never leaves a half-written manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def register_legacy(self, manifest):
+        legacy_path = os.path.join(self.folder, self.legacy_file)
+        workbook = openpyxl.load_workbook(legacy_path)
+        sheet = workbook.active
+        rows = sum(1 for values in sheet.iter_rows(min_row=2, values_only=True)
+            if any(value is not None for value in values))
+
+        # Keep the header and formatting of the existing workbook as the template for new shards
+        for other in list(workbook.worksheets):
+            if other is not sheet:
+                workbook.remove(other)
+        if sheet.max_row > 1:
+            sheet.delete_rows(2, sheet.max_row - 1)
+        self.save_workbook(workbook, self.template_path)
+
+        # The existing history becomes the first closed shard and is never compacted
+        start = datetime.fromtimestamp(os.path.getmtime(legacy_path)).strftime("%Y-%m-%d")
+        manifest["shards"].append({
+            "file": self.legacy_file,
+            "key": "legacy",
+            "start": start,
+            "rows": rows,
+            "legacy": True,
+        })
+
+    def new_workbook(self):
+        if os.path.exists(self.template_path):
+            return openpyxl.load_workbook(self.template_path)
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["No."] + list(self.headers))
+        return workbook
+
+    def save_workbook(self, workbook, path):
+        tmp_path = path + ".tmp"
+        workbook.save(tmp_path)
+        os.replace(tmp_path, path)
+
+    def current_shard(self, manifest, new_rows):
+        now = datetime.now()
+        key = now.strftime(PERIOD_FORMATS[self.period])
+        shards = manifest["shards"]
+
+        # Keep writing to the last shard while it is in the same period and under the row limit
+        if shards:
+            last = shards[-1]
+            if last["key"] == key and (last["rows"] == 0 or last["rows"] + new_rows <= self.max_rows):
+                return last
+
+        existing = {shard["file"] for shard in shards}
+        index = 1
+        while f"{self.prefix}_{key}_{index}.xlsx" in existing:
+            index += 1
+
+        shard = {
+            "file": f"{self.prefix}_{key}_{index}.xlsx",
+            "key": key,
+            "start": now.strftime("%Y-%m-%d"),
+            "rows": 0,
+        }
+        shards.append(shard)
+        return shard
+
+    def append_rows(self, rows):
+        with self.lock:
+            manifest = self.load_manifest()
+            shard = self.current_shard(manifest, len(rows))
+            path = os.path.join(self.folder, shard["file"])
+
+            # Only the current shard is opened, so upload cost stays bounded by its size
+            if os.path.exists(path):
+                workbook = openpyxl.load_workbook(path)
+            else:
+                workbook = self.new_workbook()
+            sheet = workbook.active
+
+            # Leave a blank row between uploads, starting from column 2 (B) to match "LOT ID"
+            next_row = sheet.max_row + 2
+            for row, values in enumerate(rows):
+                for col, value in enumerate(values):
+                    if value is not None:
+                        sheet.cell(row=next_row + row, column=col + 2, value=value)
+
+            self.save_workbook(workbook, path)
+            shard["rows"] += len(rows)
+            self.save_manifest(manifest)
+            return path
+
+    def compact(self, group="month"):
+        if group not in PERIOD_FORMATS:
+            raise ValueError(f"Unknown compaction period: {group}")
+
+        with self.lock:
+            # Nothing to compact before the first upload writes the manifest
+            if not os.path.exists(self.manifest_path):
+                return []
+
+            # The last shard may still receive uploads, so it is never compacted
+            closed = [shard for shard in self.load_manifest()["shards"][:-1] if not shard.get("legacy")]
+
+        groups = {}
+        for shard in closed:
+            start = datetime.strptime(shard["start"], "%Y-%m-%d")
+            groups.setdefault(start.strftime(PERIOD_FORMATS[group]), []).append(shard)
+
+        merged_files = []
+        for key, members in groups.items():
+            if len(members) < 2:
+                continue
+
+            # Closed shards are never written again, so they can be read without holding the lock
+            # Start from the template so merged shards keep the header formatting and column widths
+            merged = self.new_workbook()
+            merged_sheet = merged.active
+            rows = 0
+            for shard in members:
+                workbook = openpyxl.load_workbook(os.path.join(self.folder, shard["file"]), read_only=True)
+                for values in workbook.active.iter_rows(min_row=2, values_only=True):
+                    merged_sheet.append(values)
+                    if any(value is not None for value in values):
+                        rows += 1
+                workbook.close()
+
+            merged_name = f"{self.prefix}_{key}_merged.xlsx"
+            merged_path = os.path.join(self.folder, merged_name)
+            tmp_path = merged_path + ".tmp"
+            merged.save(tmp_path)
+
+            with self.lock:
+                manifest = self.load_manifest()
+                member_files = {shard["file"] for shard in members}
+                shards = manifest["shards"]
+                position = next(i for i, shard in enumerate(shards) if shard["file"] in member_files)
+                shards[:] = [shard for shard in shards if shard["file"] not in member_files]
+                shards.insert(position, {
+                    "file": merged_name,
+                    "key": key,
+                    "start": members[0]["start"],
+                    "rows": rows,
+                })
+
+                os.replace(tmp_path, merged_path)
+                self.save_manifest(manifest)
+
+                for name in member_files:
+                    if name != merged_name:
+                        os.remove(os.path.join(self.folder, name))
+
+            merged_files.append(merged_path)
+
+        return merged_files
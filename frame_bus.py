@@ -0,0 +1,173 @@
+import os
+import sys
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Header layout (uint64): magic, latest sequence, selected sequence, slot count, height, width, channels,
+# then one sequence per ring slot and one for the selected-frame slot that follows the ring
+MAGIC = 0x46524D43  # "FRMC"
+HEADER_FIELDS = 7
+
+# Readers in other processes attach with FrameBus(name). Attaching never takes ownership: the segment
+# stays alive when a reader exits and only the dashboard that created it unlinks it.
+
+class FrameBus:
+    def __init__(self, name, shape=None, slots=4, create=False):
+        self.name = name
+        self.owner = create
+
+        if create:
+            height, width, channels = shape
+            size = self.header_size(slots) + (slots + 1) * height * width * channels
+
+            # Raises FileExistsError if the name is taken, e.g. by another running dashboard
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+            header = np.ndarray((HEADER_FIELDS + slots + 1,), dtype=np.uint64, buffer=self.shm.buf)
+            header[:] = 0
+            header[:HEADER_FIELDS] = [MAGIC, 0, 0, slots, height, width, channels]
+            del header
+        else:
+            self.shm = self.attach(name)
+            fields = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+            if int(fields[0]) != MAGIC:
+                del fields
+                self.shm.close()
+                raise ValueError(f"Shared memory {name} is not a frame bus")
+            slots, height, width, channels = (int(value) for value in fields[3:HEADER_FIELDS])
+            del fields
+
+        self.slots = slots
+        self.shape = (height, width, channels)
+        self.header = np.ndarray((HEADER_FIELDS + slots + 1,), dtype=np.uint64, buffer=self.shm.buf)
+        self.slot_seqs = self.header[HEADER_FIELDS:]
+        self.frames = np.ndarray((slots + 1, height, width, channels), dtype=np.uint8,
+            buffer=self.shm.buf, offset=self.header_size(slots))
+
+    @staticmethod
+    def attach(name):
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+
+        shm = shared_memory.SharedMemory(name=name)
+        # Before 3.13 attaching registers the segment with this process's resource_tracker,
+        # which would unlink it (and kill the bus) as soon as this reader exits
+        if os.name == "posix":
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    @staticmethod
+    def header_size(slots):
+        # Keep the frame data 64-byte aligned
+        size = 8 * (HEADER_FIELDS + slots + 1)
+        return (size + 63) // 64 * 64
+
+    def latest_sequence(self):
+        return int(self.header[1])
+
+    def selected_sequence(self):
+        return int(self.header[2])
+
+    def write_slot(self, slot, seq, frame):
+        # An odd slot sequence tells readers the slot is being written
+        self.slot_seqs[slot] = seq * 2 + 1
+        self.frames[slot][...] = frame
+        self.slot_seqs[slot] = seq * 2
+
+    def read_slot(self, slot, seq, copy):
+        if seq <= 0 or int(self.slot_seqs[slot]) != seq * 2:
+            return None
+
+        if not copy:
+            # Zero-copy view: after using it, check is_valid(seq) for ring frames or
+            # is_selected_valid(seq) for the selected frame in case the writer overwrote it
+            return self.frames[slot]
+
+        frame = self.frames[slot].copy()
+        if int(self.slot_seqs[slot]) != seq * 2:
+            return None
+        return frame
+
+    def publish(self, frame):
+        seq = self.latest_sequence() + 1
+        self.write_slot(seq % self.slots, seq, frame)
+        self.header[1] = seq
+        return seq
+
+    def publish_selected(self, frame):
+        # The frame picked by a burst gets its own slot so it isn't overwritten by the live ring
+        seq = self.selected_sequence() + 1
+        self.write_slot(self.slots, seq, frame)
+        self.header[2] = seq
+        return seq
+
+    def read(self, seq, copy=False):
+        return self.read_slot(seq % self.slots, seq, copy)
+
+    def read_selected(self, copy=False):
+        seq = self.selected_sequence()
+        if seq == 0:
+            return None, None
+        frame = self.read_slot(self.slots, seq, copy)
+        if frame is None:
+            return None, None
+        return seq, frame
+
+    def is_valid(self, seq):
+        return seq > 0 and int(self.slot_seqs[seq % self.slots]) == seq * 2
+
+    def is_selected_valid(self, seq):
+        return seq > 0 and int(self.slot_seqs[self.slots]) == seq * 2
+
+    def reader(self):
+        return FrameReader(self)
+
+    def close(self):
+        # Views into the buffer must be released before the segment can be closed
+        self.header = None
+        self.slot_seqs = None
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        # Only the process that created the segment may remove it
+        if self.owner:
+            self.shm.unlink()
+
+class FrameReader:
+    def __init__(self, bus):
+        self.bus = bus
+        self.last_seq = bus.latest_sequence()
+        self.last_selected = bus.selected_sequence()
+        self.skipped = 0
+
+    def next_frame(self, copy=False):
+        latest = self.bus.latest_sequence()
+        if latest == self.last_seq:
+            return None, None
+
+        # Slow readers skip ahead to the newest frame instead of falling behind the writer
+        seq = self.last_seq + 1
+        if latest - seq >= self.bus.slots - 1:
+            seq = latest
+
+        frame = self.bus.read(seq, copy)
+        if frame is None and seq != latest:
+            seq = latest
+            frame = self.bus.read(seq, copy)
+        if frame is None:
+            return None, None
+
+        self.skipped += seq - self.last_seq - 1
+        self.last_seq = seq
+        return seq, frame
+
+    def next_selected(self, copy=False):
+        if self.bus.selected_sequence() == self.last_selected:
+            return None, None
+
+        seq, frame = self.bus.read_selected(copy)
+        if frame is None:
+            return None, None
+        self.last_selected = seq
+        return seq, frame
@@ -0,0 +1,49 @@
+import time
+import cv2
+import numpy as np
+
+# Defaults for score_frame; the sharpness scale depends on both, so retune FOCUS_THRESHOLD if they change
+SCORE_SCALE = 0.25
+SCORE_ROI_FRACTION = 0.5
+
+# Laplacian variance at or above which a frame counts as in focus
+FOCUS_THRESHOLD = 100.0
+
+def center_roi(frame, fraction=0.5):
+    # Crop the middle of the frame where the tray label usually sits
+    height, width = frame.shape[:2]
+    roi_h, roi_w = int(height * fraction), int(width * fraction)
+    top, left = (height - roi_h) // 2, (width - roi_w) // 2
+    return frame[top:top + roi_h, left:left + roi_w]
+
+def score_frame(frame, scale=SCORE_SCALE, roi_fraction=SCORE_ROI_FRACTION):
+    roi = center_roi(frame, roi_fraction)
+    small = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    # Variance of the Laplacian is high for sharp edges and drops with motion blur
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+    # Penalize clipped pixels and a mean brightness far from mid-gray
+    clipped = np.count_nonzero((gray <= 5) | (gray >= 250)) / gray.size
+    exposure = float((1.0 - clipped) * (1.0 - abs(float(gray.mean()) - 128.0) / 128.0))
+
+    return {"sharpness": sharpness, "exposure": exposure, "score": sharpness * exposure}
+
+def capture_best_frame(capture, count=5, time_budget=0.3):
+    best_frame = None
+    best_scores = None
+    deadline = time.monotonic() + time_budget
+
+    for _ in range(count):
+        # Don't start another blocking read once the time budget is used up
+        if time.monotonic() >= deadline:
+            break
+
+        ret, frame = capture.read()
+        if ret:
+            scores = score_frame(frame)
+            if best_scores is None or scores["score"] > best_scores["score"]:
+                best_frame, best_scores = frame, scores
+
+    return best_frame, best_scores
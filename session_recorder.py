@@ -0,0 +1,154 @@
+import time
+import struct
+import cv2
+import numpy as np
+from PyQt6.QtCore import QTimer
+
+# Record kinds stored in the session file
+FRAME = 1
+SERIAL = 2
+ACTION = 3
+START = 4  # Written when a recording starts, so sessions appended to one file replay back to back
+BURST = 5  # Frames read by a Rescan/Confirm burst, stored right after the command that triggered it
+
+# Each record is: kind (1 byte), timestamp (double), payload length (4 bytes), payload
+RECORD_HEADER = struct.Struct("<BdI")
+
+class SessionRecorder:
+    def __init__(self, path, jpeg_quality=80):
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.file = open(path, "ab")
+        self.write(START, b"")
+
+    def write(self, kind, payload):
+        self.file.write(RECORD_HEADER.pack(kind, time.time(), len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+
+    def record_frame(self, frame, kind=FRAME):
+        ret, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ret:
+            self.write(kind, encoded.tobytes())
+
+    def record_serial(self, line):
+        self.write(SERIAL, line.encode("utf-8"))
+
+    def record_action(self, name):
+        self.write(ACTION, name.encode("utf-8"))
+
+    def close(self):
+        self.file.close()
+
+class RecordingCapture:
+    # Wraps a cv2.VideoCapture so every frame read by a burst is recorded as well
+    def __init__(self, capture, recorder):
+        self.capture = capture
+        self.recorder = recorder
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if ret:
+            self.recorder.record_frame(frame, kind=BURST)
+        return ret, frame
+
+class ReplayCapture:
+    # Stands in for the camera during replay, returning the recorded burst frames in order
+    def __init__(self, frames):
+        self.frames = frames
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+def decode_frame(payload):
+    return cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def read_session(path):
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            kind, timestamp, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+
+            # A session cut off mid-record (e.g. a crash) simply ends there
+            if len(payload) < length:
+                break
+            yield kind, timestamp, payload
+
+class SessionReplayer:
+    def __init__(self, path, window, realtime=True):
+        self.path = path
+        self.window = window
+        self.realtime = realtime
+        self.records = None
+        self.pending = None
+        self.first_timestamp = None
+        self.start_time = None
+        self.session_start = None
+        self.count = 0
+
+    def start(self):
+        self.records = read_session(self.path)
+        self.start_time = time.monotonic()
+        print(f"Replaying session {self.path}")
+        self.schedule_next()
+
+    def next_record(self):
+        if self.pending is not None:
+            record, self.pending = self.pending, None
+            return record
+        return next(self.records, None)
+
+    def take_burst(self):
+        # Collect the burst frames recorded right after the current command
+        frames = []
+        while True:
+            record = self.next_record()
+            if record is None:
+                break
+            if record[0] != BURST:
+                self.pending = record
+                break
+            frame = decode_frame(record[2])
+            if frame is not None:
+                frames.append(frame)
+        return ReplayCapture(frames)
+
+    def schedule_next(self):
+        record = self.next_record()
+        if record is None:
+            elapsed = time.monotonic() - self.start_time
+            print(f"Replay finished: {self.count} records in {elapsed:.2f} s")
+            return
+
+        kind, timestamp, payload = record
+        if self.first_timestamp is None or kind == START:
+            # Each recorded session is timed from its own start, skipping gaps between sessions
+            self.first_timestamp = timestamp
+            self.session_start = time.monotonic()
+
+        # In real time, wait until the record's offset; otherwise run as fast as the event loop allows
+        delay = 0
+        if self.realtime:
+            offset = timestamp - self.first_timestamp
+            delay = max(0, int((offset - (time.monotonic() - self.session_start)) * 1000))
+
+        QTimer.singleShot(delay, lambda: self.play(kind, payload))
+
+    def play(self, kind, payload):
+        if kind == FRAME:
+            frame = decode_frame(payload)
+            if frame is not None:
+                self.window.process_frame(frame)
+        elif kind in (SERIAL, ACTION):
+            # Bursts triggered by this command read the recorded frames instead of the camera
+            self.window.replay_burst = self.take_burst()
+            self.window.handle_command(payload.decode("utf-8"))
+            self.window.replay_burst = None
+
+        self.count += 1
+        self.schedule_next()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules live at the repository root next to esp32_Dash.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Let the PyQt6 based modules import without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
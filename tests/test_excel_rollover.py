@@ -0,0 +1,154 @@
+import os
+import json
+import openpyxl
+import pytest
+from datetime import datetime
+
+import excel_rollover
+from excel_rollover import WorkbookRollover
+
+HEADERS = ["LOT ID", "CBD", "Maker", "BMS", "Total", "Timestamp"]
+
+def freeze_time(monkeypatch, value):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return value
+    monkeypatch.setattr(excel_rollover, "datetime", FrozenDatetime)
+
+def make_rows(count, lot="LOT"):
+    return [[f"{lot}{i}", "C", "M", "B", "1", "2024-01-01 00:00:00"] for i in range(count)]
+
+def manifest(rollover):
+    with open(rollover.manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_append_writes_rows_after_a_blank_row(tmp_path, monkeypatch):
+    freeze_time(monkeypatch, datetime(2024, 1, 1, 8))
+    rollover = WorkbookRollover(str(tmp_path), "Database", HEADERS)
+
+    path = rollover.append_rows(make_rows(2))
+    sheet = openpyxl.load_workbook(path).active
+    assert [cell.value for cell in sheet[1]] == ["No."] + HEADERS
+    assert sheet.cell(row=3, column=2).value == "LOT0"
+    assert sheet.cell(row=4, column=2).value == "LOT1"
+    assert manifest(rollover)["shards"][0]["rows"] == 2
+
+def test_rolls_over_on_new_day(tmp_path, monkeypatch):
+    rollover = WorkbookRollover(str(tmp_path), "Database", HEADERS)
+    freeze_time(monkeypatch, datetime(2024, 1, 1, 8))
+    first = rollover.append_rows(make_rows(1))
+    freeze_time(monkeypatch, datetime(2024, 1, 2, 8))
+    second = rollover.append_rows(make_rows(1))
+
+    assert os.path.basename(first) == "Database_2024-01-01_1.xlsx"
+    assert os.path.basename(second) == "Database_2024-01-02_1.xlsx"
+    assert len(manifest(rollover)["shards"]) == 2
+
+def test_rolls_over_on_row_limit_counting_data_rows_only(tmp_path, monkeypatch):
+    freeze_time(monkeypatch, datetime(2024, 1, 1, 8))
+    rollover = WorkbookRollover(str(tmp_path), "Database", HEADERS, max_rows=4)
+
+    # Two uploads of two rows fill the shard exactly; blank separator rows don't count
+    assert rollover.append_rows(make_rows(2)) == rollover.append_rows(make_rows(2))
+    third = rollover.append_rows(make_rows(1))
+
+    assert os.path.basename(third) == "Database_2024-01-01_2.xlsx"
+    assert [shard["rows"] for shard in manifest(rollover)["shards"]] == [4, 1]
+
+def test_unknown_period_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        WorkbookRollover(str(tmp_path), "Database", HEADERS, period="year")
+
+def test_compact_merges_closed_shards_per_month(tmp_path, monkeypatch):
+    rollover = WorkbookRollover(str(tmp_path), "Database", HEADERS)
+    for day in (1, 2, 3):
+        freeze_time(monkeypatch, datetime(2024, 1, day, 8))
+        rollover.append_rows(make_rows(2, lot=f"D{day}-"))
+
+    merged = rollover.compact(group="month")
+
+    assert [os.path.basename(path) for path in merged] == ["Database_2024-01_merged.xlsx"]
+    shards = manifest(rollover)["shards"]
+    assert [shard["file"] for shard in shards] == ["Database_2024-01_merged.xlsx", "Database_2024-01-03_1.xlsx"]
+    assert shards[0]["rows"] == 4
+    assert not os.path.exists(tmp_path / "Database_2024-01-01_1.xlsx")
+
+    sheet = openpyxl.load_workbook(merged[0]).active
+    lots = [row[1] for row in sheet.iter_rows(min_row=2, values_only=True) if row[1] is not None]
+    assert lots == ["D1-0", "D1-1", "D2-0", "D2-1"]
+
+def save_legacy(tmp_path):
+    legacy = openpyxl.Workbook()
+    sheet = legacy.active
+    sheet.title = "Records"
+    sheet.append(["No.", "LOT ID", "CBD", "Maker", "BMS", "Total", "Timestamp"])
+    sheet.column_dimensions["B"].width = 30
+    sheet.append([1, "OLD0"])
+    legacy.create_sheet("Summary").append(["Total", 1])
+    legacy.save(tmp_path / "Database_test.xlsx")
+
+def test_legacy_workbook_becomes_first_closed_shard_and_template(tmp_path, monkeypatch):
+    save_legacy(tmp_path)
+
+    freeze_time(monkeypatch, datetime(2024, 1, 1, 8))
+    rollover = WorkbookRollover(str(tmp_path), "Database_test", HEADERS, legacy_file="Database_test.xlsx")
+    path = rollover.append_rows(make_rows(1))
+
+    shards = manifest(rollover)["shards"]
+    assert shards[0] == {"file": "Database_test.xlsx", "key": "legacy", "start": shards[0]["start"], "rows": 1, "legacy": True}
+    assert os.path.basename(path) == "Database_test_2024-01-01_1.xlsx"
+
+    # New shards reuse the legacy header and column widths, and the legacy file is left untouched
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Records"]
+    sheet = workbook.active
+    assert sheet.column_dimensions["B"].width == 30
+    assert sheet.cell(row=3, column=2).value == "LOT0"
+    assert openpyxl.load_workbook(tmp_path / "Database_test.xlsx").active.cell(row=2, column=2).value == "OLD0"
+
+    # The legacy shard is never merged away
+    freeze_time(monkeypatch, datetime(2024, 1, 2, 8))
+    rollover.append_rows(make_rows(1))
+    rollover.compact(group="month")
+    assert os.path.exists(tmp_path / "Database_test.xlsx")
+
+def test_compact_before_first_upload_does_not_load_legacy(tmp_path, monkeypatch):
+    save_legacy(tmp_path)
+    rollover = WorkbookRollover(str(tmp_path), "Database_test", HEADERS, legacy_file="Database_test.xlsx")
+    calls = []
+    monkeypatch.setattr(rollover, "register_legacy", lambda manifest: calls.append(manifest))
+
+    assert rollover.compact() == []
+    assert rollover.compact() == []
+    assert calls == []
+
+def test_legacy_is_registered_once(tmp_path, monkeypatch):
+    save_legacy(tmp_path)
+    freeze_time(monkeypatch, datetime(2024, 1, 1, 8))
+    rollover = WorkbookRollover(str(tmp_path), "Database_test", HEADERS, legacy_file="Database_test.xlsx")
+
+    rollover.load_manifest()
+    assert manifest(rollover)["shards"][0]["legacy"]
+
+    calls = []
+    monkeypatch.setattr(rollover, "register_legacy", lambda manifest: calls.append(manifest))
+    rollover.append_rows(make_rows(1))
+    rollover.compact()
+    assert calls == []
+
+def test_merged_shard_keeps_template_formatting(tmp_path, monkeypatch):
+    save_legacy(tmp_path)
+    rollover = WorkbookRollover(str(tmp_path), "Database_test", HEADERS, legacy_file="Database_test.xlsx")
+    for day in (1, 2, 3):
+        freeze_time(monkeypatch, datetime(2024, 1, day, 8))
+        rollover.append_rows(make_rows(1, lot=f"D{day}-"))
+
+    merged = rollover.compact(group="month")
+
+    sheet = openpyxl.load_workbook(merged[0]).active
+    assert sheet.title == "Records"
+    assert sheet.column_dimensions["B"].width == 30
+    assert [cell.value for cell in sheet[1]] == ["No.", "LOT ID", "CBD", "Maker", "BMS", "Total", "Timestamp"]
+    lots = [row[1] for row in sheet.iter_rows(min_row=2, values_only=True) if row[1] is not None]
+    assert lots == ["D1-0", "D2-0"]
@@ -0,0 +1,167 @@
+import os
+import sys
+import subprocess
+import time
+import numpy as np
+import pytest
+
+from frame_bus import FrameBus
+
+SHAPE = (4, 6, 3)
+
+@pytest.fixture
+def bus():
+    bus = FrameBus(f"frame_bus_test_{os.getpid()}", shape=SHAPE, slots=4, create=True)
+    yield bus
+    bus.close()
+    bus.unlink()
+
+def frame(value):
+    return np.full(SHAPE, value, dtype=np.uint8)
+
+def test_reader_in_other_bus_handle_sees_published_frames(bus):
+    attached = FrameBus(bus.name)
+    reader = attached.reader()
+    assert attached.shape == SHAPE
+    assert reader.next_frame() == (None, None)
+
+    bus.publish(frame(1))
+    bus.publish(frame(2))
+    seq, first = reader.next_frame()
+    assert seq == 1 and first[0, 0, 0] == 1
+    seq, second = reader.next_frame(copy=True)
+    assert seq == 2 and second[0, 0, 0] == 2
+    assert reader.next_frame() == (None, None)
+
+    del first, second
+    attached.close()
+
+def test_zero_copy_view_is_invalidated_when_lapped(bus):
+    seq = bus.publish(frame(1))
+    view = bus.read(seq)
+    assert bus.is_valid(seq)
+
+    for value in range(2, 2 + bus.slots):
+        bus.publish(frame(value))
+    assert not bus.is_valid(seq)
+    assert bus.read(seq) is None
+    del view
+
+def test_nothing_is_readable_before_the_first_publish(bus):
+    assert bus.read(0) is None
+    assert not bus.is_valid(0)
+    assert not bus.is_selected_valid(0)
+    assert bus.read_selected() == (None, None)
+    assert bus.reader().next_frame() == (None, None)
+
+def test_zero_copy_selected_view_is_invalidated_by_next_selection(bus):
+    bus.publish_selected(frame(1))
+    seq, view = bus.read_selected()
+    assert bus.is_selected_valid(seq)
+
+    bus.publish_selected(frame(2))
+    assert not bus.is_selected_valid(seq)
+    assert bus.is_selected_valid(seq + 1)
+    del view
+
+def test_slow_reader_skips_ahead(bus):
+    reader = bus.reader()
+    for value in range(1, 11):
+        bus.publish(frame(value))
+
+    seq, latest = reader.next_frame(copy=True)
+    assert seq == 10 and latest[0, 0, 0] == 10
+    assert reader.skipped == 9
+
+def test_selected_frame_survives_the_live_ring(bus):
+    reader = bus.reader()
+    assert reader.next_selected() == (None, None)
+
+    bus.publish_selected(frame(42))
+    for value in range(1, 10):
+        bus.publish(frame(value))
+
+    seq, selected = reader.next_selected(copy=True)
+    assert seq == 1 and selected[0, 0, 0] == 42
+    assert reader.next_selected() == (None, None)
+
+def test_existing_name_is_not_replaced(bus):
+    bus.publish(frame(7))
+    with pytest.raises(FileExistsError):
+        FrameBus(bus.name, shape=SHAPE, create=True)
+
+    # The running bus is untouched and non-owners never unlink it
+    attached = FrameBus(bus.name)
+    attached.close()
+    attached.unlink()
+    assert FrameBus(bus.name).latest_sequence() == 1
+
+def test_bus_survives_reader_process_exit(bus):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = f"from frame_bus import FrameBus; FrameBus({bus.name!r}).close()"
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+    # The reader's resource_tracker cleans up asynchronously after the process exits
+    time.sleep(0.5)
+
+    attached = FrameBus(bus.name)
+    assert attached.shape == SHAPE
+    attached.close()
+
+def test_non_frame_bus_segment_is_rejected():
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=f"not_a_frame_bus_{os.getpid()}", create=True, size=128)
+    try:
+        with pytest.raises(ValueError):
+            FrameBus(shm.name)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def test_dashboard_turns_bus_off_when_name_is_taken(bus, tmp_path, monkeypatch):
+    import tempfile
+    from PyQt6.QtWidgets import QApplication
+    import esp32_Dash
+    from session_recorder import SessionRecorder
+
+    app = QApplication.instance() or QApplication([])
+    path = str(tmp_path / "session.bin")
+    SessionRecorder(path).close()
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda prefix="": str(tmp_path / "scratch"))
+
+    window = esp32_Dash.MainWindow(replay_path=path, replay_fast=True, frame_bus_name=bus.name)
+    assert window.frame_bus is None
+    window.process_frame(np.zeros((720, 1280, 3), dtype=np.uint8))
+    window.close()
+
+    # The other dashboard's bus is still there
+    bus.publish(frame(1))
+    assert FrameBus(bus.name).latest_sequence() == 1
+
+def test_dashboard_publishes_live_and_selected_frames(tmp_path, monkeypatch):
+    import tempfile
+    from PyQt6.QtWidgets import QApplication
+    import esp32_Dash
+    from session_recorder import SessionRecorder
+
+    app = QApplication.instance() or QApplication([])
+    path = str(tmp_path / "session.bin")
+    SessionRecorder(path).close()
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda prefix="": str(tmp_path / "scratch"))
+
+    name = f"dashboard_bus_test_{os.getpid()}"
+    window = esp32_Dash.MainWindow(replay_path=path, replay_fast=True, frame_bus_name=name)
+    reader = FrameBus(name).reader()
+
+    window.process_frame(np.full((360, 640, 3), 9, dtype=np.uint8))
+    seq, live = reader.next_frame(copy=True)
+    assert seq == 1 and live.shape == (720, 1280, 3)
+
+    window.capture_burst()
+    seq, selected = reader.next_selected(copy=True)
+    assert seq == 1 and selected[0, 0, 0] == 9
+
+    reader.bus.close()
+    window.close()
+    with pytest.raises(FileNotFoundError):
+        FrameBus(name)
@@ -0,0 +1,57 @@
+import time
+import cv2
+import numpy as np
+
+from frame_quality import score_frame, capture_best_frame, FOCUS_THRESHOLD
+
+def checkerboard(size=32, height=720, width=1280):
+    rows, cols = np.indices((height, width))
+    board = (((rows // size) + (cols // size)) % 2 * 200 + 28).astype(np.uint8)
+    return cv2.cvtColor(board, cv2.COLOR_GRAY2BGR)
+
+class FakeCapture:
+    def __init__(self, frames, delay=0.0):
+        self.frames = list(frames)
+        self.delay = delay
+        self.reads = 0
+
+    def read(self):
+        time.sleep(self.delay)
+        self.reads += 1
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+def test_blur_lowers_sharpness():
+    sharp = checkerboard()
+    blurred = cv2.GaussianBlur(sharp, (31, 31), 10)
+
+    assert score_frame(sharp)["sharpness"] >= FOCUS_THRESHOLD
+    assert score_frame(blurred)["sharpness"] < score_frame(sharp)["sharpness"]
+
+def test_clipped_frame_has_low_exposure():
+    mid_gray = np.full((720, 1280, 3), 128, dtype=np.uint8)
+    white = np.full((720, 1280, 3), 255, dtype=np.uint8)
+
+    assert score_frame(mid_gray)["exposure"] > 0.9
+    assert score_frame(white)["exposure"] == 0.0
+
+def test_burst_returns_sharpest_frame():
+    sharp = checkerboard()
+    frames = [cv2.GaussianBlur(sharp, (21, 21), 6), sharp, cv2.GaussianBlur(sharp, (9, 9), 2)]
+
+    best, scores = capture_best_frame(FakeCapture(frames), count=3, time_budget=5)
+
+    assert best is sharp
+    assert scores == score_frame(sharp)
+
+def test_burst_skips_failed_reads():
+    best, scores = capture_best_frame(FakeCapture([]), count=3, time_budget=5)
+    assert best is None and scores is None
+
+def test_burst_stops_reading_after_time_budget():
+    capture = FakeCapture([checkerboard()] * 10, delay=0.05)
+
+    capture_best_frame(capture, count=10, time_budget=0.12)
+
+    assert capture.reads < 10
@@ -0,0 +1,158 @@
+import time
+import numpy as np
+import pytest
+from PyQt6.QtCore import QCoreApplication, QEventLoop
+from PyQt6.QtWidgets import QApplication
+
+import session_recorder
+from session_recorder import (SessionRecorder, SessionReplayer, RecordingCapture, read_session,
+    FRAME, SERIAL, ACTION, START, BURST, RECORD_HEADER)
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+def frame(value):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+class FakeWindow:
+    def __init__(self):
+        self.events = []
+        self.replay_burst = None
+
+    def process_frame(self, frame):
+        self.events.append(("frame", int(frame.mean())))
+
+    def handle_command(self, command):
+        burst = [int(f.mean()) for f in self.replay_burst.frames]
+        self.events.append(("command", command, burst))
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "session.bin")
+    recorder = SessionRecorder(path)
+    recorder.record_frame(frame(100))
+    recorder.record_serial("rescan")
+    recorder.record_action("upload")
+    recorder.close()
+
+    records = list(read_session(path))
+    assert [kind for kind, _, _ in records] == [START, FRAME, SERIAL, ACTION]
+    assert records[2][2] == b"rescan"
+    assert records[3][2] == b"upload"
+    assert records[1][1] >= records[0][1]
+
+def test_truncated_record_ends_session(tmp_path):
+    path = tmp_path / "session.bin"
+    recorder = SessionRecorder(str(path))
+    recorder.record_action("confirm")
+    recorder.record_action("upload")
+    recorder.close()
+
+    # Cut the last payload short, as a crash mid-write would
+    path.write_bytes(path.read_bytes()[:-2])
+    assert [payload for _, _, payload in read_session(str(path))] == [b"", b"confirm"]
+
+    path.write_bytes(path.read_bytes()[:RECORD_HEADER.size - 1])
+    assert list(read_session(str(path))) == []
+
+def test_appending_starts_a_new_session(tmp_path):
+    path = str(tmp_path / "session.bin")
+    SessionRecorder(path).close()
+    SessionRecorder(path).close()
+
+    assert [kind for kind, _, _ in read_session(path)] == [START, START]
+
+def test_recording_capture_records_burst_frames(tmp_path):
+    path = str(tmp_path / "session.bin")
+    recorder = SessionRecorder(path)
+    capture = RecordingCapture(FakeCapture([frame(10), frame(20)]), recorder)
+    assert capture.read()[0] and capture.read()[0]
+    assert capture.read() == (False, None)
+    recorder.close()
+
+    assert [kind for kind, _, _ in read_session(path)] == [START, BURST, BURST]
+
+def test_replay_feeds_frames_and_bursts_to_window(app, tmp_path, monkeypatch):
+    path = str(tmp_path / "session.bin")
+    recorder = SessionRecorder(path)
+    recorder.record_frame(frame(50))
+    recorder.record_action("rescan")
+    recorder.record_frame(frame(60), kind=BURST)
+    recorder.record_frame(frame(70), kind=BURST)
+    recorder.record_frame(frame(80))
+    recorder.record_serial("upload")
+    recorder.close()
+
+    window = FakeWindow()
+    replayer = SessionReplayer(path, window, realtime=False)
+    finished = []
+    monkeypatch.setattr(session_recorder, "print", lambda *args: finished.append(args), raising=False)
+    replayer.start()
+    deadline = time.monotonic() + 5
+    while len(finished) < 2 and time.monotonic() < deadline:
+        app.processEvents()
+
+    assert window.events == [
+        ("frame", 50),
+        ("command", "rescan", [60, 70]),
+        ("frame", 80),
+        ("command", "upload", []),
+    ]
+    assert window.replay_burst is None
+
+def test_realtime_replay_skips_gap_between_sessions(app, tmp_path, monkeypatch):
+    path = str(tmp_path / "session.bin")
+    clock = iter([1000.0, 1000.1, 5000.0, 5000.1])
+    monkeypatch.setattr(session_recorder.time, "time", lambda: next(clock))
+    for _ in range(2):
+        recorder = SessionRecorder(path)
+        recorder.record_action("delete")
+        recorder.close()
+    monkeypatch.undo()
+
+    window = FakeWindow()
+    replayer = SessionReplayer(path, window, realtime=True)
+    finished = []
+    monkeypatch.setattr(session_recorder, "print", lambda *args: finished.append(args), raising=False)
+    started = time.monotonic()
+    replayer.start()
+    while len(finished) < 2 and time.monotonic() - started < 5:
+        app.processEvents()
+
+    assert [event[1] for event in window.events] == ["delete", "delete"]
+    assert time.monotonic() - started < 2
+
+def test_dashboard_replay_uses_scratch_folder_without_dialogs(app, tmp_path, monkeypatch):
+    import tempfile
+    import esp32_Dash
+
+    path = str(tmp_path / "session.bin")
+    recorder = SessionRecorder(path)
+    recorder.record_frame(frame(90))
+    recorder.record_action("upload")
+    recorder.record_action("rescan")
+    recorder.close()
+
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda prefix="": str(tmp_path / "scratch"))
+    messages = []
+    monkeypatch.setattr(esp32_Dash.QMessageBox, "warning", lambda *args: pytest.fail("modal dialog during replay"))
+    monkeypatch.setattr(session_recorder, "print", lambda *args: messages.append(args), raising=False)
+
+    window = esp32_Dash.MainWindow(replay_path=path, replay_fast=True)
+    deadline = time.monotonic() + 5
+    while not any(str(m[0]).startswith("Replay finished") for m in messages) and time.monotonic() < deadline:
+        app.processEvents()
+
+    assert window.workbook_rollover.folder == str(tmp_path / "scratch")
+    assert not window.compact_timer.isActive()
+    assert window.best_frame is not None
+    window.close()